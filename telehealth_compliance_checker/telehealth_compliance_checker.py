@@ -1,10 +1,15 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import urllib.parse
 import re
+import bisect
+import functools
 import logging
-from collections import defaultdict
+from collections import Counter, defaultdict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import time
 import json
 import os
@@ -12,6 +17,20 @@ import uuid
 import threading
 from datetime import datetime
 
+# Prefer the C-based lxml parser when it is installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Configure logging once for the whole app
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
 # Set page config
 st.set_page_config(
     page_title="Telehealth Compliance Checker",
@@ -20,6 +39,14 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Define finding record (a lightweight tuple, since large sites produce many findings;
+# use _asdict() where a dict is needed)
+Finding = namedtuple(
+    'Finding',
+    ['type', 'category', 'severity', 'pattern', 'matched_text', 'context', 'location', 'page_type', 'occurrences'],
+    defaults=['other', 1]
+)
+
 # Define compliance rules
 class ComplianceRules:
     """Class to manage compliance rules for telehealth websites."""
@@ -72,15 +99,15 @@ class ComplianceRules:
                 "category": "ftc",
                 "severity": "high",
                 "patterns": [
-                    r"lose\s+\d+\s+(?:pounds|lbs)",
-                    r"lose\s+weight\s+without\s+(?:diet|exercise)",
-                    r"effortless\s+weight\s+loss",
-                    r"melt\s+away\s+fat",
-                    r"burn\s+fat\s+while\s+you\s+sleep"
+                    r"\blose\s+\d+\s+(?:pounds|lbs)",
+                    r"\blose\s+weight\s+without\s+(?:diet|exercise)",
+                    r"\beffortless\s+weight\s+loss",
+                    r"\bmelt\s+away\s+fat",
+                    r"\bburn\s+fat\s+while\s+you\s+sleep"
                 ],
                 "context_exceptions": [
                     # Allow guarantee terms with specific weight loss amounts and timeframes
-                    r"refund\s+(?:your\s+)?money\s+if\s+\d+\s+(?:pounds|lbs|kg)\s+(?:is|are)\s+not\s+lost\s+in\s+\d+\s+(?:days|weeks|months)"
+                    r"\brefund\s+(?:your\s+)?money\s+if\s+\d+\s+(?:pounds|lbs|kg)\s+(?:is|are)\s+not\s+lost\s+in\s+\d+\s+(?:days|weeks|months)"
                 ]
             },
             "prohibited_terms": {
@@ -139,12 +166,226 @@ class ComplianceRules:
                 ]
             }
         }
+    
+    @staticmethod
+    def compile_rules(rules):
+        """
+        Return a copy of the rules with all patterns compiled once for matching.
+        
+        Patterns are lowercased and compiled case-sensitively, so they must be matched
+        against lowercased text. Each rule's patterns are fused into a single
+        alternation ('combined') so the text is scanned once per rule;
+        'pattern_by_group' maps the named group of a match back to the original
+        pattern string. 'literals' holds lowercase substrings one of which every
+        match of the rule contains, or None if some pattern has no literal to
+        pre-filter on. 'exceptions' fuses the rule's context exceptions the same
+        way (None if the rule has none).
+        """
+        compiled_rules = {}
+        for rule_name, rule in rules.items():
+            for pattern in rule['patterns']:
+                if re.compile(pattern).groupindex:
+                    raise ValueError(f"Pattern {pattern!r} in rule '{rule_name}' must not use named groups")
+            
+            compiled_rule = dict(rule)
+            compiled_rule['combined'] = re.compile('|'.join(
+                f'(?P<p{i}>{ComplianceRules._lowercase_pattern(pattern)})' for i, pattern in enumerate(rule['patterns'])
+            ))
+            compiled_rule['pattern_by_group'] = {f'p{i}': pattern for i, pattern in enumerate(rule['patterns'])}
+            
+            literals = [ComplianceRules._required_literals(pattern) for pattern in rule['patterns']]
+            compiled_rule['literals'] = None if None in literals else list(dict.fromkeys(
+                literal for pattern_literals in literals for literal in pattern_literals
+            ))
+            
+            if rule.get('context_exceptions'):
+                compiled_rule['exceptions'] = re.compile('|'.join(
+                    f'(?:{ComplianceRules._lowercase_pattern(exception)})' for exception in rule['context_exceptions']
+                ))
+            else:
+                compiled_rule['exceptions'] = None
+            compiled_rules[rule_name] = compiled_rule
+        return compiled_rules
+    
+    @staticmethod
+    @st.cache_resource(show_spinner=False)
+    def get_compiled_default_rules():
+        """
+        Return the default rules compiled with compile_rules.
+        
+        Streamlit re-executes this script on every rerun, recreating this class, so
+        the result is kept in Streamlit's resource cache, which survives reruns. It is
+        shared between all runs and sessions and must be treated as read-only.
+        """
+        return ComplianceRules.compile_rules(ComplianceRules.get_default_rules())
+    
+    @staticmethod
+    def _lowercase_pattern(pattern):
+        """Lowercase the literal characters of a pattern, leaving escapes such as \\S intact."""
+        return re.sub(r'(\\.)|[A-Z]+', lambda match: match.group(1) or match.group(0).lower(), pattern)
+    
+    @staticmethod
+    def _required_literals(pattern):
+        """
+        Return literal substrings at least one of which every match of a pattern contains.
+        
+        Candidates are literal runs outside of character classes and required groups
+        whose alternatives all have literals; the candidate whose shortest literal is
+        longest wins. Escapes end a literal run, so the result is conservative.
+        Returns a tuple of lowercased literals, or None if no candidate is found.
+        """
+        alternatives = ComplianceRules._split_alternatives(pattern)
+        if len(alternatives) > 1:
+            literals = []
+            for alternative in alternatives:
+                alternative_literals = ComplianceRules._required_literals(alternative)
+                if alternative_literals is None:
+                    return None
+                literals.extend(alternative_literals)
+            return tuple(dict.fromkeys(literals))
+        
+        candidates = []
+        current = ''
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            if char == '\\':
+                # Escapes (\b, \s, \d, ...) end the current literal run
+                candidates.append((current,))
+                current = ''
+                i += 2
+                continue
+            if char == '[':
+                # Skip the whole character class
+                candidates.append((current,))
+                current = ''
+                i = ComplianceRules._skip_pattern_item(pattern, i)
+                continue
+            if char == '(':
+                candidates.append((current,))
+                current = ''
+                end = ComplianceRules._skip_pattern_item(pattern, i)
+                body = pattern[i + 1:end - 1]
+                i = end
+                # Only plain and non-capturing groups that are not optional are required
+                if pattern[i:i + 1] not in ('?', '*', '{') and (not body.startswith('?') or body.startswith('?:')):
+                    group_literals = ComplianceRules._required_literals(body[2:] if body.startswith('?:') else body)
+                    if group_literals:
+                        candidates.append(group_literals)
+                continue
+            if char in '?*{':
+                # The preceding character is optional or repeated
+                candidates.append((current[:-1],))
+                current = ''
+                if char == '{' and '}' in pattern[i:]:
+                    i = pattern.index('}', i)
+            elif char in '+.^$':
+                candidates.append((current,))
+                current = ''
+            else:
+                current += char
+            i += 1
+        candidates.append((current,))
+        
+        candidates = [candidate for candidate in candidates if all(candidate)]
+        if not candidates:
+            return None
+        best = max(candidates, key=lambda candidate: (min(map(len, candidate)), -len(candidate)))
+        return tuple(literal.lower() for literal in best)
+    
+    @staticmethod
+    def _split_alternatives(pattern):
+        """Split a pattern on its top-level '|' separators."""
+        alternatives = []
+        start = 0
+        i = 0
+        while i < len(pattern):
+            if pattern[i] == '|':
+                alternatives.append(pattern[start:i])
+                start = i + 1
+                i += 1
+            else:
+                i = ComplianceRules._skip_pattern_item(pattern, i)
+        alternatives.append(pattern[start:])
+        return alternatives
+    
+    @staticmethod
+    def _skip_pattern_item(pattern, i):
+        """Return the index after the escape, character class, group or character at pattern[i]."""
+        char = pattern[i]
+        if char == '\\':
+            return i + 2
+        if char == '[':
+            i += 1
+            if pattern[i:i + 1] == '^':
+                i += 1
+            if pattern[i:i + 1] == ']':
+                i += 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            return i + 1
+        if char == '(':
+            i += 1
+            while i < len(pattern) and pattern[i] != ')':
+                i = ComplianceRules._skip_pattern_item(pattern, i)
+            return i + 1
+        return i + 1
 
 # Define crawler class
 class TelehealthCrawler:
     """Class to crawl telehealth websites and extract content for compliance analysis."""
     
-    def __init__(self, start_url, max_pages=20, user_agent="TelehealthComplianceCrawler/1.0"):
+    # Page type patterns are lowercase and matched against lowercased URLs and HTML
+    
+    # URL patterns used to detect page types, each list fused into one alternation
+    BLOG_URL_PATTERN = re.compile('|'.join((
+        r'/blog/', r'/articles/', r'/news/', r'/insights/',
+        r'/resources/', r'/learn/', r'/education/'
+    )))
+    
+    PRODUCT_URL_PATTERN = re.compile('|'.join((
+        r'/product/', r'/shop/', r'/buy/', r'/order/',
+        r'/pricing/', r'/plans/', r'/subscription/'
+    )))
+    
+    # Blog indicators in content, one named group per indicator
+    BLOG_INDICATORS = re.compile('|'.join(f'(?P<i{i}>{pattern})' for i, pattern in enumerate((
+        # Headers that suggest blog content (tag scans stop at the next '<' so unclosed tags stay linear)
+        r'<h\d[^<>]*>\s*(?:blog|article|post|news)\s*</h\d>',
+        # Publication date patterns
+        r'published\s+on|posted\s+on|date:',
+        # Author bylines (name limited to a few words to bound backtracking)
+        r'\bby\s+[a-z.]+(?:\s+[a-z.]+){0,4}\s*[|,(]\s*[a-z]{3,}\s+\d{1,2},?\s+\d{4}',
+        # Common blog metadata
+        r'<meta[^<>]*(?:article:published_time|article:author|og:article)'
+    ))))
+    
+    # Product indicators in content, one named group per indicator
+    PRODUCT_INDICATORS = re.compile('|'.join(f'(?P<i{i}>{pattern})' for i, pattern in enumerate((
+        # Price indicators
+        r'\$\d+(?:\.\d{2})?',
+        # Add to cart/buy now buttons
+        r'add\s+to\s+cart|buy\s+now|purchase|subscribe|get\s+started',
+        # Product description indicators
+        r'product\s+details|specifications|ingredients|what\'s\s+included',
+        # Shipping information
+        r'shipping|delivery|in\s+stock'
+    ))))
+    
+    # Browser-like headers sent with every request
+    REQUEST_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Referer': 'https://www.google.com/',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Cache-Control': 'max-age=0'
+    }
+    
+    def __init__(self, start_url, max_pages=20, user_agent="TelehealthComplianceCrawler/1.0", max_workers=8,
+                 store_html=False, max_page_bytes=2 * 1024 * 1024):
         # Normalize the start URL if it doesn't have a protocol
         if not start_url.startswith('http://') and not start_url.startswith('https://'):
             start_url = 'https://' + start_url
@@ -153,20 +394,37 @@ class TelehealthCrawler:
         self.base_domain = self._extract_domain(start_url)
         self.max_pages = max_pages
         self.visited_urls = set()
-        self.queue = [start_url]
+        self.queue = deque([start_url])
+        self.queued_urls = {start_url}  # Every URL ever queued, for O(1) membership tests
         self.page_content = {}
         self.forms = {}
         self.images = {}
         self.pdfs = {}
         self.page_types = {}  # Store page types (blog, product, other)
         self.user_agent = user_agent
+        self.max_workers = max_workers
+        self.store_html = store_html  # Keep raw HTML per page (not needed by the analyzer)
+        self.max_page_bytes = max_page_bytes  # Larger pages are truncated
+        
+        # Reuse connections (HTTP keep-alive) across all requests of the crawl
+        self.session = requests.Session()
+        self.session.headers.update(self.REQUEST_HEADERS)
         
-        # Configure logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
+        # Retry rate-limited and transient server errors with exponential backoff,
+        # returning the last response so protection pages are still reported.
+        # Retry-After is ignored, since a large value would stall a fetch worker
+        # (and with it the crawl) for as long as the server asks.
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET'],
+            raise_on_status=False,
+            respect_retry_after_header=False
         )
-        self.logger = logging.getLogger('telehealth_crawler')
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def _extract_domain(self, url):
         """Extract base domain from URL."""
@@ -203,136 +461,100 @@ class TelehealthCrawler:
         
         return url
     
-    def _extract_links(self, soup, base_url):
-        """Extract all links from a page."""
+    def _extract_elements(self, soup, url):
+        """
+        Extract links, forms, images, and PDF links from a page in a single pass.
+        
+        Returns:
+            list: Same-domain links that have not been visited yet
+        """
         links = []
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
-            absolute_url = self._normalize_url(href, base_url)
-            if self._is_same_domain(absolute_url) and absolute_url not in self.visited_urls:
-                links.append(absolute_url)
-        return links
-    
-    def _extract_forms(self, soup, url):
-        """Extract forms from a page."""
         forms_data = []
-        for form in soup.find_all('form'):
-            form_data = {
-                'action': form.get('action', ''),
-                'method': form.get('method', 'get'),
-                'inputs': []
-            }
+        images_data = []
+        pdf_links = []
+        
+        for tag in soup.find_all(['a', 'form', 'img']):
+            if tag.name == 'a':
+                href = tag.get('href')
+                if href is None:
+                    continue
+                
+                absolute_url = self._normalize_url(href, url)
+                if self._is_same_domain(absolute_url) and absolute_url not in self.visited_urls:
+                    links.append(absolute_url)
+                
+                if href.lower().endswith('.pdf'):
+                    pdf_links.append({
+                        'url': absolute_url,
+                        'text': tag.get_text(strip=True)
+                    })
             
-            for input_tag in form.find_all(['input', 'textarea', 'select']):
-                input_data = {
-                    'type': input_tag.get('type', 'text'),
-                    'name': input_tag.get('name', ''),
-                    'id': input_tag.get('id', ''),
-                    'placeholder': input_tag.get('placeholder', ''),
-                    'required': input_tag.has_attr('required')
-                }
-                form_data['inputs'].append(input_data)
+            elif tag.name == 'form':
+                forms_data.append(self._extract_form(tag))
             
-            forms_data.append(form_data)
+            else:
+                images_data.append({
+                    'src': tag.get('src', ''),
+                    'alt': tag.get('alt', ''),
+                    'title': tag.get('title', '')
+                })
         
         if forms_data:
             self.forms[url] = forms_data
-    
-    def _extract_images(self, soup, url):
-        """Extract images from a page."""
-        images_data = []
-        for img in soup.find_all('img'):
-            image_data = {
-                'src': img.get('src', ''),
-                'alt': img.get('alt', ''),
-                'title': img.get('title', '')
-            }
-            images_data.append(image_data)
-        
         if images_data:
             self.images[url] = images_data
-    
-    def _extract_pdfs(self, soup, url):
-        """Extract links to PDF files."""
-        pdf_links = []
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href']
-            if href.lower().endswith('.pdf'):
-                absolute_url = self._normalize_url(href, url)
-                pdf_links.append({
-                    'url': absolute_url,
-                    'text': a_tag.get_text(strip=True)
-                })
-        
         if pdf_links:
             self.pdfs[url] = pdf_links
+        
+        return links
     
-    def _detect_page_type(self, url, soup, text):
+    def _extract_form(self, form):
+        """Extract the action, method, and inputs of a form."""
+        form_data = {
+            'action': form.get('action', ''),
+            'method': form.get('method', 'get'),
+            'inputs': []
+        }
+        
+        for input_tag in form.find_all(['input', 'textarea', 'select']):
+            input_data = {
+                'type': input_tag.get('type', 'text'),
+                'name': input_tag.get('name', ''),
+                'id': input_tag.get('id', ''),
+                'placeholder': input_tag.get('placeholder', ''),
+                'required': input_tag.has_attr('required')
+            }
+            form_data['inputs'].append(input_data)
+        
+        return form_data
+    
+    def _detect_page_type(self, url, raw_html):
         """
         Detect the type of page (blog, product, etc.)
         
+        Content indicators are matched against the raw HTML of the response.
+        
         Returns:
             str: Page type ('blog', 'product', 'other')
         """
-        # Check URL patterns
-        blog_url_patterns = [
-            r'/blog/', r'/articles/', r'/news/', r'/insights/',
-            r'/resources/', r'/learn/', r'/education/'
-        ]
-        
-        product_url_patterns = [
-            r'/product/', r'/shop/', r'/buy/', r'/order/',
-            r'/pricing/', r'/plans/', r'/subscription/'
-        ]
+        url = url.lower()
         
         # Check URL for blog indicators
-        for pattern in blog_url_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                return 'blog'
+        if self.BLOG_URL_PATTERN.search(url):
+            return 'blog'
         
         # Check URL for product indicators
-        for pattern in product_url_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                return 'product'
+        if self.PRODUCT_URL_PATTERN.search(url):
+            return 'product'
         
         # Check content indicators if URL patterns don't match
-        
-        # Blog indicators in content
-        blog_indicators = [
-            # Headers that suggest blog content
-            r'<h\d[^>]*>\s*(?:blog|article|post|news)\s*</h\d>',
-            # Publication date patterns
-            r'published\s+on|posted\s+on|date:',
-            # Author bylines
-            r'by\s+[a-z\s\.]+\s*(?:\||,|\()\s*[a-z]{3,}\s+\d{1,2},?\s+\d{4}',
-            # Common blog metadata
-            r'<meta[^>]*(?:article:published_time|article:author|og:article)'
-        ]
-        
-        # Product indicators in content
-        product_indicators = [
-            # Price indicators
-            r'\$\d+(?:\.\d{2})?',
-            # Add to cart/buy now buttons
-            r'add\s+to\s+cart|buy\s+now|purchase|subscribe|get\s+started',
-            # Product description indicators
-            r'product\s+details|specifications|ingredients|what\'s\s+included',
-            # Shipping information
-            r'shipping|delivery|in\s+stock'
-        ]
+        html_lower = raw_html.lower()
         
         # Check HTML for blog indicators
-        blog_score = 0
-        html_str = str(soup)
-        for pattern in blog_indicators:
-            if re.search(pattern, html_str, re.IGNORECASE):
-                blog_score += 1
+        blog_score = self._count_indicators(self.BLOG_INDICATORS, html_lower)
         
         # Check HTML for product indicators
-        product_score = 0
-        for pattern in product_indicators:
-            if re.search(pattern, html_str, re.IGNORECASE):
-                product_score += 1
+        product_score = self._count_indicators(self.PRODUCT_INDICATORS, html_lower)
         
         # Determine page type based on scores
         if blog_score > product_score and blog_score >= 2:
@@ -342,19 +564,26 @@ class TelehealthCrawler:
         else:
             return 'other'
     
+    @staticmethod
+    def _is_html(response):
+        """Check whether a response holds an HTML document (assumed if no Content-Type is sent)."""
+        content_type = response.headers.get('Content-Type', '').lower()
+        return not content_type or 'html' in content_type
+    
+    @staticmethod
+    def _count_indicators(pattern, html):
+        """Count how many distinct indicators of a combined pattern occur in the HTML."""
+        found = set()
+        for match in pattern.finditer(html):
+            found.add(match.lastgroup)
+            if len(found) == len(pattern.groupindex):
+                break
+        return len(found)
+    
     def _get_page_content(self, url):
         """Get page content with enhanced handling for difficult sites."""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Referer': 'https://www.google.com/',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Cache-Control': 'max-age=0'
-            }
+            headers = {}
             
             # Add special handling for known problematic sites
             if 'hims.com' in url or 'forhims.com' in url:
@@ -366,75 +595,84 @@ class TelehealthCrawler:
             else:
                 timeout = 10
             
-            response = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
+            # Stream the body so it can be skipped or truncated before it is downloaded
+            response = self.session.get(url, headers=headers, timeout=timeout, allow_redirects=True, stream=True)
             
             # Handle potential cloudflare or other protection
             if response.status_code == 403 or response.status_code == 503:
-                self.logger.warning(f"Access denied for {url}, possibly due to protection mechanisms")
+                logger.warning(f"Access denied for {url}, possibly due to protection mechanisms")
                 # Could implement more sophisticated handling here
                 
             return response
             
         except Exception as e:
-            self.logger.error(f"Error fetching {url}: {e}")
+            logger.error(f"Error fetching {url}: {e}")
             return None
     
+    def _fetch_page(self, url):
+        """
+        Fetch a page and read its HTML body.
+        
+        Returns:
+            tuple: (response, html), html being None unless the response is a successful
+                HTML document
+        """
+        response = self._get_page_content(url)
+        if response is None:
+            return None, None
+        
+        try:
+            # Only download the body of HTML documents; PDFs and images linked from pages are skipped
+            if response.status_code != 200 or not self._is_html(response):
+                return response, None
+            return response, self._read_html(response)
+        finally:
+            response.close()
+    
+    def _read_html(self, response):
+        """Read and decode a streamed response body, truncated to max_page_bytes."""
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=65536):
+            body += chunk
+            if len(body) > self.max_page_bytes:
+                logger.warning(f"Truncating {response.url} to {self.max_page_bytes} bytes")
+                del body[self.max_page_bytes:]
+                break
+        
+        try:
+            return body.decode(response.encoding or 'utf-8', errors='replace')
+        except LookupError:
+            # Unknown charset declared by the server
+            return body.decode('utf-8', errors='replace')
+    
     def crawl(self, progress_callback=None):
         """Start crawling the website."""
-        self.logger.info(f"Starting crawl from {self.start_url}")
+        logger.info(f"Starting crawl from {self.start_url}")
         
-        while self.queue and len(self.visited_urls) < self.max_pages:
-            current_url = self.queue.pop(0)
-            
-            if current_url in self.visited_urls:
-                continue
-            
-            self.logger.info(f"Crawling: {current_url}")
-            if progress_callback:
-                progress_callback(f"Crawling: {current_url}", len(self.visited_urls) / self.max_pages)
-            
-            try:
-                response = self._get_page_content(current_url)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while self.queue and len(self.visited_urls) < self.max_pages:
+                # Take a batch of unvisited URLs, never more than the remaining page budget
+                batch_size = min(self.max_workers, self.max_pages - len(self.visited_urls))
+                batch = []
+                while self.queue and len(batch) < batch_size:
+                    url = self.queue.popleft()
+                    if url not in self.visited_urls:
+                        batch.append(url)
                 
-                if response and response.status_code == 200:
-                    # Parse with BeautifulSoup
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Detect page type
-                    page_type = self._detect_page_type(current_url, soup, response.text)
-                    self.page_types[current_url] = page_type
-                    
-                    # Store page content
-                    self.page_content[current_url] = {
-                        'title': soup.title.string if soup.title else '',
-                        'html': response.text,
-                        'text': soup.get_text(separator=' ', strip=True),
-                        'meta_description': soup.find('meta', attrs={'name': 'description'})['content'] if soup.find('meta', attrs={'name': 'description'}) else '',
-                        'headers': [h.get_text(strip=True) for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])],
-                        'page_type': page_type
-                    }
+                # Fetch the batch concurrently; parsing and bookkeeping stay on this thread
+                # and follow batch order, so the queue grows exactly as in a serial BFS
+                futures = [(url, executor.submit(self._fetch_page, url)) for url in batch]
+                for current_url, future in futures:
+                    logger.debug("Crawling: %s", current_url)
+                    if progress_callback:
+                        progress_callback(f"Crawling: {current_url}", len(self.visited_urls) / self.max_pages)
                     
-                    # Extract forms, images, and PDFs
-                    self._extract_forms(soup, current_url)
-                    self._extract_images(soup, current_url)
-                    self._extract_pdfs(soup, current_url)
-                    
-                    # Extract links and add to queue
-                    links = self._extract_links(soup, current_url)
-                    for link in links:
-                        if link not in self.visited_urls and link not in self.queue:
-                            self.queue.append(link)
-                    
-                    # Mark as visited
-                    self.visited_urls.add(current_url)
-                else:
-                    status_code = response.status_code if response else "Connection failed"
-                    self.logger.warning(f"Failed to fetch {current_url}: HTTP {status_code}")
-                
-            except Exception as e:
-                self.logger.error(f"Error crawling {current_url}: {e}")
+                    try:
+                        self._process_response(current_url, *future.result())
+                    except Exception as e:
+                        logger.error(f"Error crawling {current_url}: {e}")
         
-        self.logger.info(f"Crawl completed. Visited {len(self.visited_urls)} pages.")
+        logger.info(f"Crawl completed. Visited {len(self.visited_urls)} pages.")
         
         return {
             'pages': self.page_content,
@@ -443,31 +681,90 @@ class TelehealthCrawler:
             'pdfs': self.pdfs,
             'page_types': self.page_types
         }
+    
+    def _process_response(self, current_url, response, html):
+        """Parse a fetched page, store its content and queue newly discovered links."""
+        if response and response.status_code == 200:
+            if html is None:
+                logger.debug("Skipping non-HTML content at %s", current_url)
+                return
+            
+            # Parse with BeautifulSoup
+            soup = BeautifulSoup(html, HTML_PARSER)
+            
+            # Detect page type
+            page_type = self._detect_page_type(current_url, html)
+            self.page_types[current_url] = page_type
+            
+            # Store page content
+            title_tag = soup.title
+            meta_tag = soup.find('meta', attrs={'name': 'description'})
+            self.page_content[current_url] = {
+                'title': title_tag.string if title_tag else '',
+                'text': soup.get_text(separator=' ', strip=True),
+                'meta_description': meta_tag.get('content', '') if meta_tag else '',
+                'headers': [h.get_text(strip=True) for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])],
+                'page_type': page_type
+            }
+            if self.store_html:
+                self.page_content[current_url]['html'] = html
+            
+            # Extract forms, images, PDFs, and links in one pass, then queue the links
+            links = self._extract_elements(soup, current_url)
+            for link in links:
+                if link not in self.visited_urls and link not in self.queued_urls:
+                    self.queue.append(link)
+                    self.queued_urls.add(link)
+            
+            # Mark as visited
+            self.visited_urls.add(current_url)
+        else:
+            status_code = response.status_code if response else "Connection failed"
+            logger.warning(f"Failed to fetch {current_url}: HTTP {status_code}")
 
 # Define analyzer class
 class ComplianceAnalyzer:
     """Class to analyze website content for compliance issues."""
     
-    def __init__(self, crawler_data):
+    # Form input keywords that indicate health-related information (matched against lowercased input attributes)
+    HEALTH_INPUT_PATTERN = re.compile('|'.join((
+        r'health', r'medical', r'symptom', r'condition',
+        r'diagnosis', r'treatment', r'medication', r'prescription',
+        r'weight', r'height', r'bmi', r'blood'
+    )))
+    
+    # Keywords that reference each required page (matched as substrings of lowercased text).
+    # Longer phrases such as "privacy policy" or "terms of service" contain these keywords.
+    REQUIRED_PAGE_KEYWORDS = {
+        'privacy': ('privacy',),
+        'terms': ('terms', 'conditions')
+    }
+    
+    # Maximum points of each score category and the points deducted per finding of each severity
+    SCORE_WEIGHTS = {
+        'hipaa': (25, {'high': 5, 'medium': 2, 'low': 0.5}),
+        'fda': (25, {'high': 5, 'medium': 2, 'low': 0.5}),
+        'legitscript': (20, {'high': 4, 'medium': 1.5, 'low': 0.5}),
+        'ftc': (15, {'high': 3, 'medium': 1.5, 'low': 0.5}),
+        'technical': (15, {'high': 3, 'medium': 1.5, 'low': 0.5})
+    }
+    
+    def __init__(self, crawler_data, max_workers=None):
         self.crawler_data = crawler_data
+        self.max_workers = max_workers
         self.pages = crawler_data['pages']
         self.forms = crawler_data['forms']
         self.images = crawler_data['images']
         self.pdfs = crawler_data['pdfs']
         self.page_types = crawler_data['page_types']
         
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger('compliance_analyzer')
-        
-        # Load compliance rules
-        self.rules = ComplianceRules.get_default_rules()
+        # Load compliance rules and compile their patterns once
+        self.rules = ComplianceRules.get_compiled_default_rules()
+        self._rules_by_page_type = {}
         
-        # Initialize findings
+        # Initialize findings, counting them as they are added
         self.findings = defaultdict(list)
+        self.total_findings = 0
         self.scores = {
             'hipaa': 0,
             'fda': 0,
@@ -479,405 +776,418 @@ class ComplianceAnalyzer:
     
     def analyze_pages(self, progress_callback=None):
         """Analyze all pages for compliance issues."""
-        self.logger.info("Starting compliance analysis")
+        logger.info("Starting compliance analysis")
         
         total_pages = len(self.pages)
-        for i, (url, page_data) in enumerate(self.pages.items()):
-            self.logger.info(f"Analyzing page: {url}")
-            if progress_callback:
-                progress_callback(f"Analyzing page: {url}", i / total_pages)
-            
-            # Get page type
-            page_type = page_data.get('page_type', 'other')
-            
-            # Analyze page content
-            self._analyze_text_content(url, page_data['text'], page_data['title'], page_type)
-            
-            # Analyze headers
-            self._analyze_headers(url, page_data['headers'], page_type)
-            
-            # Check for HTTPS
-            self._check_https(url)
-            
-            # Analyze forms if present
-            if url in self.forms:
-                self._analyze_forms(url, self.forms[url], page_type)
-            
-            # Analyze images if present
-            if url in self.images:
-                self._analyze_images(url, self.images[url], page_type)
+        
+        # Check URLs for required pages first, so page content only has to be
+        # searched for the kinds they do not reference
+        required_pages = self._find_required_pages_in_urls()
+        analyze_page = functools.partial(self._analyze_page, url_required_pages=frozenset(required_pages))
+        
+        # Resolve the rules of every page type up front, so the workers only read them
+        for page_data in self.pages.values():
+            self._applicable_rules(page_data.get('page_type', 'other'))
+        
+        # Pages are independent, so analyze them concurrently and merge the
+        # findings on this thread in crawl order; a pool only pays off for several pages.
+        # A page is never split further: re holds the GIL while scanning, and word
+        # boundaries and exception windows would break at chunk edges.
+        if total_pages < 2 or self.max_workers == 1:
+            executor = None
+            page_results = map(analyze_page, self.pages.keys(), self.pages.values())
+        else:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            page_results = executor.map(analyze_page, self.pages.keys(), self.pages.values())
+        
+        try:
+            for i, (url, (findings, page_required_pages)) in enumerate(zip(self.pages.keys(), page_results)):
+                logger.debug("Analyzed page: %s", url)
+                if progress_callback:
+                    progress_callback(f"Analyzed page: {url}", (i + 1) / total_pages)
+                
+                if findings:
+                    self.findings[url].extend(findings)
+                    self.total_findings += len(findings)
+                required_pages |= page_required_pages
+        finally:
+            if executor is not None:
+                executor.shutdown()
         
         # Check for privacy policy and terms
-        self._check_required_pages()
+        self._check_required_pages(required_pages)
         
         # Calculate scores
         self._calculate_scores()
         
         return {
             'findings': dict(self.findings),
+            'total_findings': self.total_findings,
             'scores': self.scores
         }
     
-    def _analyze_text_content(self, url, text, title, page_type):
-        """Analyze page text content for compliance issues with context awareness."""
-        # Check each rule against the text
-        for rule_name, rule in self.rules.items():
-            # Check if rule has page type specific handling
-            if 'page_type_rules' in rule and page_type in rule['page_type_rules']:
-                rule_action = rule['page_type_rules'][page_type]
-                
-                # Skip checking if rule action is to allow
-                if rule_action == 'allow':
-                    continue
-                    
-                # Always flag if rule action is to flag
-                elif rule_action == 'flag':
-                    # Process all patterns without exceptions
-                    for pattern in rule['patterns']:
-                        matches = re.finditer(pattern, text, re.IGNORECASE)
-                        
-                        for match in matches:
-                            # Get surrounding context
-                            start = max(0, match.start() - 50)
-                            end = min(len(text), match.end() + 50)
-                            context = text[start:end]
-                            
-                            # Add finding
-                            self.findings[url].append({
-                                'type': rule_name,
-                                'category': rule['category'],
-                                'severity': rule['severity'],
-                                'pattern': pattern,
-                                'matched_text': match.group(0),
-                                'context': context.strip(),
-                                'location': 'page_content',
-                                'page_type': page_type
-                            })
-                    
-                    # Skip to next rule
+    @staticmethod
+    def _lower(text):
+        """Lowercase text while keeping every character at the same offset."""
+        text_lower = text.lower()
+        if len(text_lower) != len(text):
+            # A few characters (e.g. 'İ') lowercase to more than one code point
+            text_lower = ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+        return text_lower
+    
+    def _analyze_page(self, url, page_data, url_required_pages=frozenset()):
+        """
+        Analyze a single page without touching shared state.
+        
+        The page text is only searched for required page kinds (see
+        REQUIRED_PAGE_KEYWORDS) that are not in url_required_pages.
+        
+        Returns:
+            tuple: (findings, required_pages), required_pages being url_required_pages
+                plus the required page kinds referenced in the page text
+        """
+        findings = []
+        required_pages = set(url_required_pages)
+        
+        # Get page type and the rules that apply to it
+        page_type = page_data.get('page_type', 'other')
+        rules = self._applicable_rules(page_type)
+        
+        # Lowercase the page text once for both the rule scan and the required page check
+        text_lower = self._lower(page_data['text'])
+        
+        # Analyze page content
+        self._analyze_text_content(findings, page_data['text'], text_lower, page_type, rules)
+        self._find_required_pages(text_lower, required_pages)
+        
+        # Analyze headers
+        self._analyze_headers(findings, page_data['headers'], page_type, rules)
+        
+        # Check for HTTPS
+        self._check_https(findings, url)
+        
+        # Analyze forms if present
+        if url in self.forms:
+            self._analyze_forms(findings, self.forms[url], page_type)
+        
+        # Analyze images if present
+        if url in self.images:
+            self._analyze_images(findings, self.images[url], page_type, rules)
+        
+        return self._merge_duplicate_findings(findings), required_pages
+    
+    @staticmethod
+    def _merge_duplicate_findings(findings):
+        """
+        Merge findings of a page that repeat the same match in the same location.
+        
+        The first finding of each group is kept (with its context) and gets the
+        group's size as its 'occurrences' count, which scoring weights by.
+        """
+        merged = {}
+        occurrences = Counter()
+        for finding in findings:
+            key = (finding.type, finding.severity, finding.location, finding.matched_text)
+            merged.setdefault(key, finding)
+            occurrences[key] += 1
+        return [
+            finding._replace(occurrences=occurrences[key]) if occurrences[key] > 1 else finding
+            for key, finding in merged.items()
+        ]
+    
+    def _applicable_rules(self, page_type):
+        """
+        Get the rules to run on a page type, resolved once per page type.
+        
+        Rules with an 'applies_to' set of page types that does not include the page
+        type, and rules whose action for the page type is 'allow', are left out.
+        analyze_pages resolves every page type before analyzing pages concurrently,
+        so the cache is only read from the worker threads.
+        
+        Returns:
+            list: (rule_name, rule, action) tuples, action being 'flag' (ignore context
+                exceptions) or 'check_context' (default)
+        """
+        if page_type not in self._rules_by_page_type:
+            applicable_rules = []
+            for rule_name, rule in self.rules.items():
+                if 'applies_to' in rule and page_type not in rule['applies_to']:
                     continue
+                action = rule.get('page_type_rules', {}).get(page_type, 'check_context')
+                if action != 'allow':
+                    applicable_rules.append((rule_name, rule, action))
+            self._rules_by_page_type[page_type] = applicable_rules
+        
+        return self._rules_by_page_type[page_type]
+    
+    def _iter_rule_matches(self, text_lower, rules, offsets=None):
+        """
+        Scan lowercased text with the given applicable rules.
+        
+        The text may be several segments joined by '\\0' (which no pattern matches),
+        with offsets holding the start of each segment plus a final end offset;
+        context exception windows never extend past the matched segment.
+        
+        Yields:
+            tuple: (rule_name, rule, pattern, match, segment) for each match that is
+                not in a context exception, segment being the index of the matched segment
+        """
+        if offsets is None:
+            offsets = [0, len(text_lower) + 1]
+        
+        for rule_name, rule, action in rules:
+            # Skip the regex scan when none of the rule's required literals occur
+            if rule['literals'] is not None and not any(literal in text_lower for literal in rule['literals']):
+                continue
             
-            # Standard pattern checking with exceptions
-            for pattern in rule['patterns']:
-                matches = re.finditer(pattern, text, re.IGNORECASE)
+            for match in rule['combined'].finditer(text_lower):
+                segment = bisect.bisect_right(offsets, match.start()) - 1
                 
-                for match in matches:
-                    # Check if match is in an exception context
-                    if 'context_exceptions' in rule:
-                        exception_found = False
-                        for exception in rule['context_exceptions']:
-                            # Get surrounding context (100 chars before and after)
-                            start = max(0, match.start() - 100)
-                            end = min(len(text), match.end() + 100)
-                            context = text[start:end]
-                            
-                            if re.search(exception, context, re.IGNORECASE):
-                                exception_found = True
-                                break
-                        
-                        if exception_found:
-                            continue
-                    
-                    # Get surrounding context (50 chars before and after)
-                    start = max(0, match.start() - 50)
-                    end = min(len(text), match.end() + 50)
-                    context = text[start:end]
-                    
-                    # Add finding
-                    self.findings[url].append({
-                        'type': rule_name,
-                        'category': rule['category'],
-                        'severity': rule['severity'],
-                        'pattern': pattern,
-                        'matched_text': match.group(0),
-                        'context': context.strip(),
-                        'location': 'page_content',
-                        'page_type': page_type
-                    })
-    
-    def _analyze_headers(self, url, headers, page_type):
-        """Analyze page headers for compliance issues."""
-        for header in headers:
-            for rule_name, rule in self.rules.items():
-                # Check if rule has page type specific handling
-                if 'page_type_rules' in rule and page_type in rule['page_type_rules']:
-                    rule_action = rule['page_type_rules'][page_type]
+                # Check if match is in an exception context (100 chars before and after),
+                # unless the rule always flags this page type
+                if action != 'flag' and rule['exceptions'] is not None:
+                    start = max(offsets[segment], match.start() - 100)
+                    end = min(offsets[segment + 1] - 1, match.end() + 100)
                     
-                    # Skip checking if rule action is to allow
-                    if rule_action == 'allow':
+                    # Search only the window around the match
+                    if rule['exceptions'].search(text_lower, start, end):
                         continue
                 
-                for pattern in rule['patterns']:
-                    if re.search(pattern, header, re.IGNORECASE):
-                        # Check if match is in an exception context
-                        if 'context_exceptions' in rule:
-                            exception_found = False
-                            for exception in rule['context_exceptions']:
-                                if re.search(exception, header, re.IGNORECASE):
-                                    exception_found = True
-                                    break
-                            
-                            if exception_found:
-                                continue
-                        
-                        # Add finding
-                        self.findings[url].append({
-                            'type': rule_name,
-                            'category': rule['category'],
-                            'severity': rule['severity'],
-                            'pattern': pattern,
-                            'matched_text': header,
-                            'context': header,
-                            'location': 'header',
-                            'page_type': page_type
-                        })
+                yield rule_name, rule, rule['pattern_by_group'][match.lastgroup], match, segment
     
-    def _check_https(self, url):
+    def _analyze_text_content(self, findings, text, text_lower, page_type, rules):
+        """Analyze page text content for compliance issues with context awareness."""
+        # Match against the lowercased copy (see _lower); offsets are identical, so
+        # matched text and context are sliced from the original text
+        for rule_name, rule, pattern, match, _ in self._iter_rule_matches(text_lower, rules):
+            # Get surrounding context (50 chars before and after)
+            start = max(0, match.start() - 50)
+            end = min(len(text), match.end() + 50)
+            context = text[start:end]
+            
+            # Add finding
+            findings.append(Finding(
+                type=rule_name,
+                category=rule['category'],
+                severity=rule['severity'],
+                pattern=pattern,
+                matched_text=text[match.start():match.end()],
+                context=context.strip(),
+                location='page_content',
+                page_type=page_type
+            ))
+    
+    def _analyze_headers(self, findings, headers, page_type, rules):
+        """Analyze page headers for compliance issues."""
+        if not headers:
+            return
+        
+        # Scan all headers at once as a single corpus
+        corpus, offsets = self._join_segments(headers)
+        
+        # Report each matching pattern once per header
+        reported = set()
+        for rule_name, rule, pattern, match, index in self._iter_rule_matches(corpus, rules, offsets):
+            if (index, rule_name, pattern) in reported:
+                continue
+            reported.add((index, rule_name, pattern))
+            
+            # Add finding
+            findings.append(Finding(
+                type=rule_name,
+                category=rule['category'],
+                severity=rule['severity'],
+                pattern=pattern,
+                matched_text=headers[index],
+                context=headers[index],
+                location='header',
+                page_type=page_type
+            ))
+    
+    def _join_segments(self, segments):
+        """
+        Join text segments into one lowercased corpus separated by '\\0'.
+        
+        Returns:
+            tuple: (corpus, offsets) where offsets holds the start of each segment
+                followed by the end offset of the corpus plus one
+        """
+        offsets = [0]
+        for segment in segments:
+            offsets.append(offsets[-1] + len(segment) + 1)
+        return self._lower('\0'.join(segments)), offsets
+    
+    def _check_https(self, findings, url):
         """Check if page uses HTTPS."""
         if url.startswith('http://'):
-            self.findings[url].append({
-                'type': 'security_issues',
-                'category': 'technical',
-                'severity': 'high',
-                'pattern': 'http://',
-                'matched_text': url,
-                'context': f"Non-secure URL: {url}",
-                'location': 'url'
-            })
+            findings.append(Finding(
+                type='security_issues',
+                category='technical',
+                severity='high',
+                pattern='http://',
+                matched_text=url,
+                context=f"Non-secure URL: {url}",
+                location='url'
+            ))
     
-    def _analyze_forms(self, url, forms, page_type):
+    def _analyze_forms(self, findings, forms, page_type):
         """Analyze forms for compliance issues."""
         for form_index, form in enumerate(forms):
             # Check for sensitive input types
-            sensitive_inputs = []
+            has_sensitive_input = False
             for input_data in form['inputs']:
-                input_type = input_data.get('type', '').lower()
                 input_name = input_data.get('name', '').lower()
                 input_id = input_data.get('id', '').lower()
                 input_placeholder = input_data.get('placeholder', '').lower()
                 
                 # Check for health-related inputs
-                health_patterns = [
-                    r'health', r'medical', r'symptom', r'condition',
-                    r'diagnosis', r'treatment', r'medication', r'prescription',
-                    r'weight', r'height', r'bmi', r'blood'
-                ]
-                
-                for pattern in health_patterns:
-                    if (re.search(pattern, input_name, re.IGNORECASE) or
-                        re.search(pattern, input_id, re.IGNORECASE) or
-                        re.search(pattern, input_placeholder, re.IGNORECASE)):
-                        sensitive_inputs.append(input_data)
+                if (self.HEALTH_INPUT_PATTERN.search(input_name) or
+                    self.HEALTH_INPUT_PATTERN.search(input_id) or
+                    self.HEALTH_INPUT_PATTERN.search(input_placeholder)):
+                    has_sensitive_input = True
+                    break
             
             # Check if form has HTTPS action
             if form['action'] and form['action'].startswith('http://'):
-                self.findings[url].append({
-                    'type': 'security_issues',
-                    'category': 'technical',
-                    'severity': 'high',
-                    'pattern': 'http://',
-                    'matched_text': form['action'],
-                    'context': f"Form submits to non-secure URL: {form['action']}",
-                    'location': f"form_{form_index}_action",
-                    'page_type': page_type
-                })
+                findings.append(Finding(
+                    type='security_issues',
+                    category='technical',
+                    severity='high',
+                    pattern='http://',
+                    matched_text=form['action'],
+                    context=f"Form submits to non-secure URL: {form['action']}",
+                    location=f"form_{form_index}_action",
+                    page_type=page_type
+                ))
             
             # Check if sensitive form doesn't use POST method
-            if sensitive_inputs and form['method'].lower() != 'post':
-                self.findings[url].append({
-                    'type': 'security_issues',
-                    'category': 'technical',
-                    'severity': 'medium',
-                    'pattern': 'form method',
-                    'matched_text': form['method'],
-                    'context': f"Form with sensitive health information uses {form['method']} method instead of POST",
-                    'location': f"form_{form_index}_method",
-                    'page_type': page_type
-                })
+            if has_sensitive_input and form['method'].lower() != 'post':
+                findings.append(Finding(
+                    type='security_issues',
+                    category='technical',
+                    severity='medium',
+                    pattern='form method',
+                    matched_text=form['method'],
+                    context=f"Form with sensitive health information uses {form['method']} method instead of POST",
+                    location=f"form_{form_index}_method",
+                    page_type=page_type
+                ))
     
-    def _analyze_images(self, url, images, page_type):
+    def _analyze_images(self, findings, images, page_type, rules):
         """Analyze images for compliance issues."""
-        for image_index, image in enumerate(images):
-            # Check alt text and title for compliance issues
-            for text_field in ['alt', 'title']:
-                if not image[text_field]:
-                    continue
-                
-                for rule_name, rule in self.rules.items():
-                    # Check if rule has page type specific handling
-                    if 'page_type_rules' in rule and page_type in rule['page_type_rules']:
-                        rule_action = rule['page_type_rules'][page_type]
-                        
-                        # Skip checking if rule action is to allow
-                        if rule_action == 'allow':
-                            continue
-                    
-                    for pattern in rule['patterns']:
-                        if re.search(pattern, image[text_field], re.IGNORECASE):
-                            # Check if match is in an exception context
-                            if 'context_exceptions' in rule:
-                                exception_found = False
-                                for exception in rule['context_exceptions']:
-                                    if re.search(exception, image[text_field], re.IGNORECASE):
-                                        exception_found = True
-                                        break
-                                
-                                if exception_found:
-                                    continue
-                            
-                            self.findings[url].append({
-                                'type': rule_name,
-                                'category': rule['category'],
-                                'severity': rule['severity'],
-                                'pattern': pattern,
-                                'matched_text': image[text_field],
-                                'context': f"Image {text_field}: {image[text_field]}",
-                                'location': f"image_{text_field}",
-                                'page_type': page_type
-                            })
-    
-    def _check_required_pages(self):
-        """Check for required pages like privacy policy and terms."""
-        privacy_found = False
-        terms_found = False
+        # Check alt text and title for compliance issues, scanning all fields at once
+        fields = [(image, text_field) for image in images for text_field in ['alt', 'title'] if image[text_field]]
+        if not fields:
+            return
         
-        privacy_patterns = [r'privacy', r'privacy\s+policy', r'privacy\s+notice']
-        terms_patterns = [r'terms', r'terms\s+of\s+(?:use|service)', r'conditions']
+        corpus, offsets = self._join_segments([image[text_field] for image, text_field in fields])
         
-        for url in self.pages.keys():
-            # Check URL for privacy policy
-            for pattern in privacy_patterns:
-                if re.search(pattern, url, re.IGNORECASE):
-                    privacy_found = True
+        # Report each matching pattern once per field
+        reported = set()
+        for rule_name, rule, pattern, match, index in self._iter_rule_matches(corpus, rules, offsets):
+            if (index, rule_name, pattern) in reported:
+                continue
+            reported.add((index, rule_name, pattern))
             
-            # Check URL for terms
-            for pattern in terms_patterns:
-                if re.search(pattern, url, re.IGNORECASE):
-                    terms_found = True
-        
-        # Check page content if not found in URLs
-        if not privacy_found or not terms_found:
-            for url, page_data in self.pages.items():
-                text = page_data['text'].lower()
-                
-                # Check for privacy policy links
-                if not privacy_found:
-                    for pattern in privacy_patterns:
-                        if re.search(pattern, text, re.IGNORECASE):
-                            privacy_found = True
-                
-                # Check for terms links
-                if not terms_found:
-                    for pattern in terms_patterns:
-                        if re.search(pattern, text, re.IGNORECASE):
-                            terms_found = True
+            image, text_field = fields[index]
+            findings.append(Finding(
+                type=rule_name,
+                category=rule['category'],
+                severity=rule['severity'],
+                pattern=pattern,
+                matched_text=image[text_field],
+                context=f"Image {text_field}: {image[text_field]}",
+                location=f"image_{text_field}",
+                page_type=page_type
+            ))
+    
+    def _find_required_pages_in_urls(self):
+        """Return the required page kinds referenced in the crawled URLs, stopping once all are found."""
+        found = set()
+        for url in self.pages.keys():
+            if len(found) == len(self.REQUIRED_PAGE_KEYWORDS):
+                break
+            self._find_required_pages(url.lower(), found)
+        return found
+    
+    def _check_required_pages(self, found):
+        """Check for required pages like privacy policy and terms, given the kinds found in URLs and page content."""
+        privacy_found = 'privacy' in found
+        terms_found = 'terms' in found
         
         # Add findings if required pages are missing
         if not privacy_found:
-            self.findings['site_wide'].append({
-                'type': 'missing_privacy_policy',
-                'category': 'hipaa',
-                'severity': 'high',
-                'pattern': 'privacy policy',
-                'matched_text': 'N/A',
-                'context': 'No privacy policy found on the website',
-                'location': 'site_wide'
-            })
+            self.findings['site_wide'].append(Finding(
+                type='missing_privacy_policy',
+                category='hipaa',
+                severity='high',
+                pattern='privacy policy',
+                matched_text='N/A',
+                context='No privacy policy found on the website',
+                location='site_wide'
+            ))
+            self.total_findings += 1
         
         if not terms_found:
-            self.findings['site_wide'].append({
-                'type': 'missing_terms',
-                'category': 'legal',
-                'severity': 'medium',
-                'pattern': 'terms of service',
-                'matched_text': 'N/A',
-                'context': 'No terms of service found on the website',
-                'location': 'site_wide'
-            })
+            self.findings['site_wide'].append(Finding(
+                type='missing_terms',
+                category='legal',
+                severity='medium',
+                pattern='terms of service',
+                matched_text='N/A',
+                context='No terms of service found on the website',
+                location='site_wide'
+            ))
+            self.total_findings += 1
+    
+    def _find_required_pages(self, text, found):
+        """Add the kind of every required page referenced in lowercased text to found."""
+        for page, keywords in self.REQUIRED_PAGE_KEYWORDS.items():
+            if page not in found and any(keyword in text for keyword in keywords):
+                found.add(page)
     
     def _calculate_scores(self):
         """Calculate compliance scores based on findings."""
-        # Initialize category counts
-        category_counts = {
-            'hipaa': {'high': 0, 'medium': 0, 'low': 0},
-            'fda': {'high': 0, 'medium': 0, 'low': 0},
-            'legitscript': {'high': 0, 'medium': 0, 'low': 0},
-            'ftc': {'high': 0, 'medium': 0, 'low': 0},
-            'technical': {'high': 0, 'medium': 0, 'low': 0}
-        }
-        
-        # Count findings by category and severity
-        for url, url_findings in self.findings.items():
+        # Count findings by category and severity, including merged duplicates
+        category_counts = Counter()
+        for url_findings in self.findings.values():
             for finding in url_findings:
-                category = finding['category']
-                severity = finding['severity']
-                
-                if category in category_counts and severity in category_counts[category]:
-                    category_counts[category][severity] += 1
+                category_counts[(finding.category, finding.severity)] += finding.occurrences
         
-        # Calculate scores
-        # HIPAA (25 points)
-        hipaa_deductions = (
-            category_counts['hipaa']['high'] * 5 +
-            category_counts['hipaa']['medium'] * 2 +
-            category_counts['hipaa']['low'] * 0.5
-        )
-        self.scores['hipaa'] = max(0, 25 - min(hipaa_deductions, 25))
-        
-        # FDA (25 points)
-        fda_deductions = (
-            category_counts['fda']['high'] * 5 +
-            category_counts['fda']['medium'] * 2 +
-            category_counts['fda']['low'] * 0.5
-        )
-        self.scores['fda'] = max(0, 25 - min(fda_deductions, 25))
-        
-        # LegitScript (20 points)
-        legitscript_deductions = (
-            category_counts['legitscript']['high'] * 4 +
-            category_counts['legitscript']['medium'] * 1.5 +
-            category_counts['legitscript']['low'] * 0.5
-        )
-        self.scores['legitscript'] = max(0, 20 - min(legitscript_deductions, 20))
-        
-        # FTC (15 points)
-        ftc_deductions = (
-            category_counts['ftc']['high'] * 3 +
-            category_counts['ftc']['medium'] * 1.5 +
-            category_counts['ftc']['low'] * 0.5
-        )
-        self.scores['ftc'] = max(0, 15 - min(ftc_deductions, 15))
-        
-        # Technical (15 points)
-        technical_deductions = (
-            category_counts['technical']['high'] * 3 +
-            category_counts['technical']['medium'] * 1.5 +
-            category_counts['technical']['low'] * 0.5
-        )
-        self.scores['technical'] = max(0, 15 - min(technical_deductions, 15))
+        # Deduct weighted finding counts from each category's maximum points
+        for category, (max_points, severity_weights) in self.SCORE_WEIGHTS.items():
+            deductions = sum(
+                category_counts[(category, severity)] * weight
+                for severity, weight in severity_weights.items()
+            )
+            self.scores[category] = max(0, max_points - min(deductions, max_points))
         
         # Calculate total score (out of 100)
-        self.scores['total'] = sum([
-            self.scores['hipaa'],
-            self.scores['fda'],
-            self.scores['legitscript'],
-            self.scores['ftc'],
-            self.scores['technical']
-        ])
+        self.scores['total'] = sum(self.scores[category] for category in self.SCORE_WEIGHTS)
 
 # Define recommendations generator class
 class RecommendationsGenerator:
     """Class to generate recommendations based on compliance findings."""
     
+    # Number of progress updates to report while generating recommendations
+    PROGRESS_UPDATES = 100
+    
     def __init__(self, analysis_results):
         self.findings = analysis_results['findings']
+        self.total_findings = analysis_results['total_findings']
         self.scores = analysis_results['scores']
         self.recommendations = {
             'high_priority': [],
             'medium_priority': [],
             'low_priority': []
         }
-        self.recommendation_templates = self._load_recommendation_templates()
+        
+        # Templates are split around their {matched_text} placeholder once, so filling
+        # one in is a concatenation rather than a str.format call
+        self.recommendation_templates = {
+            finding_type: {severity: template.partition('{matched_text}') for severity, template in templates.items()}
+            for finding_type, templates in self._load_recommendation_templates().items()
+        }
     
     def _load_recommendation_templates(self):
         """Load recommendation templates."""
@@ -942,52 +1252,59 @@ class RecommendationsGenerator:
     def generate_recommendations(self, progress_callback=None):
         """Generate recommendations based on findings."""
         # Process findings and generate recommendations
-        total_findings = sum(len(findings) for findings in self.findings.values())
+        total_findings = self.total_findings
         processed_findings = 0
         
+        # Each progress update re-renders Streamlit widgets, so report roughly
+        # PROGRESS_UPDATES times in total rather than once per finding
+        update_every = max(1, total_findings // self.PROGRESS_UPDATES)
+        
+        # The same branded term tends to be found on every page, so formatted
+        # recommendations are shared between identical findings
+        formatted_recommendations = {}
+        priority_lists = {
+            'high': self.recommendations['high_priority'],
+            'medium': self.recommendations['medium_priority']
+        }
+        
         for url, url_findings in self.findings.items():
             for finding in url_findings:
-                finding_type = finding['type']
-                severity = finding['severity']
-                matched_text = finding['matched_text']
-                page_type = finding.get('page_type', 'other')
+                finding_type = finding.type
+                severity = finding.severity
+                matched_text = finding.matched_text
+                page_type = finding.page_type
                 
-                if progress_callback:
-                    processed_findings += 1
+                processed_findings += 1
+                if progress_callback and (processed_findings % update_every == 0 or processed_findings == total_findings):
                     progress_callback(f"Generating recommendations...", processed_findings / total_findings)
                 
-                # Get recommendation template
-                if finding_type in self.recommendation_templates and severity in self.recommendation_templates[finding_type]:
-                    template = self.recommendation_templates[finding_type][severity]
-                    recommendation = template.format(matched_text=matched_text)
-                    
-                    # Add location information
-                    location_info = f"URL: {url}" if url != 'site_wide' else "Site-wide issue"
-                    if page_type != 'other':
-                        location_info += f" (Page type: {page_type})"
-                    
-                    # Add to appropriate priority list
-                    if severity == 'high':
-                        self.recommendations['high_priority'].append({
-                            'recommendation': recommendation,
-                            'location': location_info,
-                            'context': finding['context'],
-                            'category': finding['category']
-                        })
-                    elif severity == 'medium':
-                        self.recommendations['medium_priority'].append({
-                            'recommendation': recommendation,
-                            'location': location_info,
-                            'context': finding['context'],
-                            'category': finding['category']
-                        })
+                # Fill in the recommendation template once per distinct finding
+                key = (finding_type, severity, matched_text)
+                if key not in formatted_recommendations:
+                    template = self.recommendation_templates.get(finding_type, {}).get(severity)
+                    if template is None:
+                        formatted_recommendations[key] = None
                     else:
-                        self.recommendations['low_priority'].append({
-                            'recommendation': recommendation,
-                            'location': location_info,
-                            'context': finding['context'],
-                            'category': finding['category']
-                        })
+                        left, placeholder, right = template
+                        formatted_recommendations[key] = left + matched_text + right if placeholder else left
+                recommendation = formatted_recommendations[key]
+                if recommendation is None:
+                    continue
+                
+                # Add location information
+                location_info = f"URL: {url}" if url != 'site_wide' else "Site-wide issue"
+                if page_type != 'other':
+                    location_info += f" (Page type: {page_type})"
+                if finding.occurrences > 1:
+                    location_info += f" ({finding.occurrences} occurrences)"
+                
+                # Add to appropriate priority list
+                priority_lists.get(severity, self.recommendations['low_priority']).append({
+                    'recommendation': recommendation,
+                    'location': location_info,
+                    'context': finding.context,
+                    'category': finding.category
+                })
         
         # Add general recommendations based on scores
         self._add_general_recommendations()
@@ -1161,37 +1478,13 @@ def main():
             tab1, tab2, tab3 = st.tabs(["High Priority", "Medium Priority", "Low Priority"])
             
             with tab1:
-                if recommendations['recommendations']['high_priority']:
-                    for i, rec in enumerate(recommendations['recommendations']['high_priority']):
-                        with st.expander(f"{i+1}. {rec['recommendation'][:100]}..."):
-                            st.markdown(f"**Recommendation:** {rec['recommendation']}")
-                            st.markdown(f"**Location:** {rec['location']}")
-                            st.markdown(f"**Category:** {rec['category'].upper()}")
-                            st.markdown(f"**Context:** \"{rec['context']}\"")
-                else:
-                    st.info("No high priority issues found.")
+                display_recommendations(recommendations['recommendations']['high_priority'], "high")
             
             with tab2:
-                if recommendations['recommendations']['medium_priority']:
-                    for i, rec in enumerate(recommendations['recommendations']['medium_priority']):
-                        with st.expander(f"{i+1}. {rec['recommendation'][:100]}..."):
-                            st.markdown(f"**Recommendation:** {rec['recommendation']}")
-                            st.markdown(f"**Location:** {rec['location']}")
-                            st.markdown(f"**Category:** {rec['category'].upper()}")
-                            st.markdown(f"**Context:** \"{rec['context']}\"")
-                else:
-                    st.info("No medium priority issues found.")
+                display_recommendations(recommendations['recommendations']['medium_priority'], "medium")
             
             with tab3:
-                if recommendations['recommendations']['low_priority']:
-                    for i, rec in enumerate(recommendations['recommendations']['low_priority']):
-                        with st.expander(f"{i+1}. {rec['recommendation'][:100]}..."):
-                            st.markdown(f"**Recommendation:** {rec['recommendation']}")
-                            st.markdown(f"**Location:** {rec['location']}")
-                            st.markdown(f"**Category:** {rec['category'].upper()}")
-                            st.markdown(f"**Context:** \"{rec['context']}\"")
-                else:
-                    st.info("No low priority issues found.")
+                display_recommendations(recommendations['recommendations']['low_priority'], "low")
             
             # Display crawled pages
             st.header("Crawled Pages")
@@ -1206,44 +1499,88 @@ def main():
         else:
             st.error("Please enter a valid URL.")
 
+# Number of recommendations per priority shown as individual expanders
+MAX_RECOMMENDATION_EXPANDERS = 20
+
+def display_recommendations(recommendations, priority):
+    """Display recommendations of one priority, the first ones as expanders and the rest as a single table."""
+    if not recommendations:
+        st.info(f"No {priority} priority issues found.")
+        return
+    
+    # Every widget is a round trip to the browser, so only the first recommendations get their own expander
+    for i, rec in enumerate(recommendations[:MAX_RECOMMENDATION_EXPANDERS]):
+        with st.expander(f"{i+1}. {rec['recommendation'][:100]}..."):
+            st.markdown(
+                f"**Recommendation:** {rec['recommendation']}\n\n"
+                f"**Location:** {rec['location']}\n\n"
+                f"**Category:** {rec['category'].upper()}\n\n"
+                f"**Context:** \"{rec['context']}\""
+            )
+    
+    remaining = recommendations[MAX_RECOMMENDATION_EXPANDERS:]
+    if remaining:
+        st.markdown(f"**{len(remaining)} more {priority} priority recommendations:**")
+        st.dataframe(
+            [
+                {
+                    '#': i + 1,
+                    'Recommendation': rec['recommendation'],
+                    'Location': rec['location'],
+                    'Category': rec['category'].upper(),
+                    'Context': rec['context']
+                }
+                for i, rec in enumerate(remaining, start=MAX_RECOMMENDATION_EXPANDERS)
+            ],
+            use_container_width=True,
+            hide_index=True
+        )
+
+# Reference material shown below the results
+_REF_PROHIBITED_TERMS = """
+The following terms should be avoided when marketing GLP-1 medications:
+- **Proven**: Implies definitive efficacy without proper context
+- **Efficacy**: Makes medical claims about the effectiveness
+- **Safe**: Makes safety claims that require FDA approval
+- **Semaglutide**: Branded ingredient requiring prescription
+- **Tirzepatide**: Branded ingredient requiring prescription
+- **Same ingredients**: Implies equivalence to FDA-approved medications
+"""
+
+_REF_MANUFACTURER_GUIDELINES = """
+#### Novo Nordisk (Ozempic, Wegovy, Saxenda)
+- Avoid direct comparisons to branded medications
+- Do not imply that compounded products are the same as FDA-approved medications
+- Clearly distinguish between informational content and marketing claims
+
+#### Lilly (Mounjaro, Zepbound)
+- Avoid claims of equivalence to branded medications
+- Do not use branded terms in product marketing
+- Maintain clear separation between educational content and product promotion
+"""
+
+_REF_GUARANTEE = """
+Money-back guarantees are permitted when:
+- They specify a concrete amount of weight loss
+- They specify a concrete timeframe
+- They do not make unrealistic claims
+
+Example of acceptable guarantee: "We'll refund your money if you don't lose at least 10 pounds in 3 months."
+"""
+
 def display_reference_materials():
     """Display reference materials for GLP-1 compliance."""
     st.header("GLP-1 Compliance Reference Materials")
     
     st.subheader("Prohibited Terms for GLP-1 Marketing")
-    st.markdown("""
-    The following terms should be avoided when marketing GLP-1 medications:
-    - **Proven**: Implies definitive efficacy without proper context
-    - **Efficacy**: Makes medical claims about the effectiveness
-    - **Safe**: Makes safety claims that require FDA approval
-    - **Semaglutide**: Branded ingredient requiring prescription
-    - **Tirzepatide**: Branded ingredient requiring prescription
-    - **Same ingredients**: Implies equivalence to FDA-approved medications
-    """)
+    st.markdown(_REF_PROHIBITED_TERMS)
     
     st.subheader("Manufacturer Guidelines")
     
-    st.markdown("""
-    #### Novo Nordisk (Ozempic, Wegovy, Saxenda)
-    - Avoid direct comparisons to branded medications
-    - Do not imply that compounded products are the same as FDA-approved medications
-    - Clearly distinguish between informational content and marketing claims
-    
-    #### Lilly (Mounjaro, Zepbound)
-    - Avoid claims of equivalence to branded medications
-    - Do not use branded terms in product marketing
-    - Maintain clear separation between educational content and product promotion
-    """)
+    st.markdown(_REF_MANUFACTURER_GUIDELINES)
     
     st.subheader("Guarantee Terms Guidelines")
-    st.markdown("""
-    Money-back guarantees are permitted when:
-    - They specify a concrete amount of weight loss
-    - They specify a concrete timeframe
-    - They do not make unrealistic claims
-    
-    Example of acceptable guarantee: "We'll refund your money if you don't lose at least 10 pounds in 3 months."
-    """)
+    st.markdown(_REF_GUARANTEE)
 
 if __name__ == "__main__":
     main()